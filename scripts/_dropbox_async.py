@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Shared async Dropbox REST scan for the laptop-tools scripts
+
+The SDK's requests transport blocks per call, so even a thread pool
+pays connection setup and context-switch overhead on every page fetch.
+This module talks to the /2/files/list_folder endpoints directly with
+aiohttp: one event loop, one connection pool, and a bounded semaphore
+keep up to MAX_IN_FLIGHT continuation calls in the air at once.
+
+aiohttp is optional - callers should check `aiohttp is None` and fall
+back to the SDK scan.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from _dropbox_auth import TOKEN_FILE, REFRESH_TOKEN_FILE
+
+API_URL = 'https://api.dropboxapi.com/2'
+OAUTH_URL = 'https://api.dropboxapi.com/oauth2/token'
+
+# Dropbox tolerates ~100 req/s; 50 in-flight requests saturates the
+# scan well before that while leaving headroom for retries
+MAX_IN_FLIGHT = 50
+
+
+async def get_access_token(session):
+    """Resolve an access token: refresh flow, env var, or token file.
+
+    Same priority as load_dropbox_client: the refresh token never
+    expires, while the .dropbox-token file holds a 4-hour access token
+    that dropbox-setup-oauth.py wrote alongside it - preferring the
+    file would 401 every run after the first 4 hours.
+    """
+    if os.path.exists(REFRESH_TOKEN_FILE):
+        with open(REFRESH_TOKEN_FILE, 'r') as f:
+            lines = f.read().strip().split('\n')
+        if len(lines) == 3:
+            app_key, app_secret, refresh_token = lines
+            async with session.post(OAUTH_URL, data={
+                'grant_type': 'refresh_token',
+                'refresh_token': refresh_token,
+                'client_id': app_key,
+                'client_secret': app_secret,
+            }) as resp:
+                resp.raise_for_status()
+                return (await resp.json())['access_token']
+
+    token = os.environ.get('DROPBOX_TOKEN')
+    if not token and os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'r') as f:
+            token = f.read().strip()
+    return token or None
+
+
+async def _post(session, sem, token, endpoint, payload):
+    """POST one RPC call, honoring 429 Retry-After backoff"""
+    delay = 1
+    while True:
+        async with sem:
+            async with session.post(
+                f'{API_URL}{endpoint}',
+                headers={'Authorization': f'Bearer {token}',
+                         'Content-Type': 'application/json'},
+                data=json.dumps(payload),
+            ) as resp:
+                if resp.status == 429:
+                    wait = float(resp.headers.get('Retry-After', delay))
+                    delay = min(delay * 2, 60)
+                else:
+                    resp.raise_for_status()
+                    return await resp.json()
+        await asyncio.sleep(wait)
+
+
+def _file_info(entry):
+    """file_info dict from a raw REST entry (same shape as the SDK scan)"""
+    name = entry['name']
+    stem, dot, ext = name.rpartition('.')
+    path = entry['path_display']
+    slash = path.find('/', 1)
+    modified = entry.get('client_modified')
+    return {
+        'path': path,
+        'name': name,
+        'size': entry['size'],
+        'modified_epoch': (datetime.fromisoformat(modified.replace('Z', '+00:00')).timestamp()
+                           if modified else None),
+        'hash': entry.get('content_hash'),
+        'extension': ('.' + ext.lower()) if dot and stem else '',
+        'top_folder': path[:slash] if slash > 0 else '/',
+    }
+
+
+async def list_subtree(session, sem, token, path, recursive=True):
+    """List one subtree; returns (files, folders) as plain dicts"""
+    files = []
+    folders = []
+    result = await _post(session, sem, token, '/files/list_folder',
+                         {'path': path, 'recursive': recursive,
+                          'limit': 2000})
+    while True:
+        for entry in result['entries']:
+            if entry['.tag'] == 'file':
+                files.append(_file_info(entry))
+            elif entry['.tag'] == 'folder':
+                folders.append({'path': entry['path_display'],
+                                'name': entry['name']})
+
+        if not result['has_more']:
+            return files, folders
+
+        result = await _post(session, sem, token, '/files/list_folder/continue',
+                             {'cursor': result['cursor']})
+
+
+async def _scan(token=None):
+    async with aiohttp.ClientSession() as session:
+        if token is None:
+            token = await get_access_token(session)
+        if not token:
+            raise RuntimeError('No Dropbox credentials found')
+
+        sem = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+        # Shallow root listing gives the top-level fan-out units
+        root_files, top_folders = await list_subtree(
+            session, sem, token, '', recursive=False)
+
+        results = await asyncio.gather(*[
+            list_subtree(session, sem, token, folder['path'])
+            for folder in top_folders
+        ])
+
+        all_files = list(root_files)
+        all_folders = list(top_folders)
+        for files, folders in results:
+            all_files.extend(files)
+            all_folders.extend(folders)
+        return all_files, all_folders
+
+
+def scan_account(token=None):
+    """Scan the whole account; returns (all_files, all_folders).
+
+    Synchronous entry point - runs the event loop internally so callers
+    don't need to be async themselves.
+    """
+    return asyncio.run(_scan(token))
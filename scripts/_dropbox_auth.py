@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Shared Dropbox client loading for the laptop-tools scripts
+
+Every script used to carry its own byte-for-byte copy of
+load_dropbox_client(); this is the single home for it now. The client
+is memoized so repeated calls in one process skip the token-file reads.
+"""
+
+import functools
+import os
+
+import dropbox
+
+TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-token')
+REFRESH_TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-refresh-token')
+
+
+@functools.lru_cache(maxsize=1)
+def load_dropbox_client():
+    """Load Dropbox client with refresh token support"""
+    # Try refresh token first (best option - never expires)
+    if os.path.exists(REFRESH_TOKEN_FILE):
+        with open(REFRESH_TOKEN_FILE, 'r') as f:
+            lines = f.read().strip().split('\n')
+            if len(lines) == 3:
+                app_key, app_secret, refresh_token = lines
+                return dropbox.Dropbox(
+                    app_key=app_key,
+                    app_secret=app_secret,
+                    oauth2_refresh_token=refresh_token
+                )
+
+    # Fall back to access token (expires in 4 hours)
+    token = os.environ.get('DROPBOX_TOKEN')
+    if not token and os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'r') as f:
+            token = f.read().strip()
+
+    if token:
+        return dropbox.Dropbox(token)
+
+    return None
@@ -4,51 +4,65 @@ Fast batch delete using Dropbox files_delete_batch API
 Handles up to 1000 files per request with async job polling
 """
 
-import os
+import itertools
 import sys
 import time
 import dropbox
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dropbox.exceptions import ApiError
 
-TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-token')
-REFRESH_TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-refresh-token')
-
-def load_dropbox_client():
-    """Load Dropbox client with refresh token support"""
-    if os.path.exists(REFRESH_TOKEN_FILE):
-        with open(REFRESH_TOKEN_FILE, 'r') as f:
-            lines = f.read().strip().split('\n')
-            if len(lines) == 3:
-                app_key, app_secret, refresh_token = lines
-                return dropbox.Dropbox(
-                    app_key=app_key,
-                    app_secret=app_secret,
-                    oauth2_refresh_token=refresh_token
-                )
-
-    token = os.environ.get('DROPBOX_TOKEN')
-    if not token and os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'r') as f:
-            token = f.read().strip()
-
-    if token:
-        return dropbox.Dropbox(token)
-
-    return None
-
-def batch_delete_fast(dbx, paths, batch_size=1000):
-    """Delete files using bulk batch API (up to 1000 per request)"""
-    total = len(paths)
-    deleted = 0
-    failed = 0
+from _dropbox_auth import load_dropbox_client
 
-    num_batches = (total + batch_size - 1) // batch_size
+# Dropbox batch jobs are independent and I/O-bound, so a few in flight
+# at once overlaps network RTT + server-side job execution. Keep this
+# modest to stay under the too_many_write_operations ceiling.
+MAX_CONCURRENT_BATCHES = 4
 
-    for i in range(0, total, batch_size):
-        batch = paths[i:i+batch_size]
-        batch_num = i//batch_size + 1
+# Bail out of async-job polling cleanly if a batch gets stuck
+POLL_DEADLINE_SECONDS = 600
 
-        print(f"\nBatch {batch_num}/{num_batches} ({len(batch)} files)")
+def iter_unique_paths(list_file):
+    """Stream non-empty paths from a list file, skipping repeats.
+
+    Keeps O(unique paths) for the seen-set instead of materializing the
+    whole multi-million-line list before batching starts.
+    """
+    seen = set()
+    with open(list_file, 'r') as f:
+        for line in f:
+            path = line.strip()
+            if path and path not in seen:
+                seen.add(path)
+                yield path
+
+def count_paths(list_file):
+    """Cheap one-pass line count for progress totals"""
+    with open(list_file, 'r') as f:
+        return sum(1 for line in f if line.strip())
+
+def iter_batches(paths, batch_size):
+    """Yield batch_size-sized lists from any iterable of paths.
+
+    islice pulls chunks lazily, so only one batch needs to exist as a
+    list at a time and no up-front batch-count indexing pass is needed.
+    """
+    paths_iter = iter(paths)
+    while True:
+        chunk = list(itertools.islice(paths_iter, batch_size))
+        if not chunk:
+            break
+        yield chunk
+
+def run_batch(dbx, batch, batch_num):
+    """Submit one delete batch and poll it to completion.
+
+    Returns (deleted, failed) for the batch. Rate-limit errors back off
+    exponentially and retry, so the delay is only paid when Dropbox
+    actually pushes back.
+    """
+    backoff = 1
+    while True:
+        print(f"\nBatch {batch_num} ({len(batch)} files)")
 
         try:
             # Create delete batch entries
@@ -61,37 +75,78 @@ def batch_delete_fast(dbx, paths, batch_size=1000):
             if isinstance(result, dropbox.files.DeleteBatchLaunch):
                 if result.is_complete():
                     batch_result = result.get_complete()
-                    deleted += process_batch_result(batch_result, batch)
+                    return process_batch_result(batch_result, batch), 0
                 elif result.is_async_job_id():
                     async_job_id = result.get_async_job_id()
                     print(f"  Async job {async_job_id} started, polling...")
 
-                    # Poll for completion
+                    # Poll for completion with exponential backoff:
+                    # small jobs finish in well under a second, so start
+                    # at 50ms and back off to 1s for the long tail
+                    delay = 0.05
+                    deadline = time.monotonic() + POLL_DEADLINE_SECONDS
                     while True:
-                        time.sleep(1)
+                        time.sleep(delay)
                         check = dbx.files_delete_batch_check(async_job_id)
 
                         if check.is_complete():
                             batch_result = check.get_complete()
-                            deleted += process_batch_result(batch_result, batch)
-                            break
+                            return process_batch_result(batch_result, batch), 0
                         elif check.is_failed():
                             print(f"  ✗ Batch failed: {check.get_failed()}")
-                            failed += len(batch)
-                            break
+                            return 0, len(batch)
                         # else: still in_progress, keep polling
+                        if time.monotonic() > deadline:
+                            print(f"  ✗ Gave up polling job {async_job_id} after {POLL_DEADLINE_SECONDS}s")
+                            return 0, len(batch)
+                        delay = min(delay * 2, 1.0)
 
-            print(f"  Progress: {deleted}/{total} deleted")
-
-            # Rate limiting: wait between batches to avoid too_many_write_operations
-            if batch_num < num_batches:
-                time.sleep(2)
+            return 0, len(batch)
 
         except ApiError as e:
+            if 'too_many_write_operations' in str(e) and backoff <= 32:
+                print(f"  ⚠ Rate limited, retrying in {backoff}s...")
+                time.sleep(backoff)
+                backoff *= 2
+                continue
             print(f"  ✗ Batch API error: {e}")
-            failed += len(batch)
-            # Wait longer after an error
-            time.sleep(5)
+            return 0, len(batch)
+
+def batch_delete_fast(dbx, paths, batch_size=1000, total=None):
+    """Delete files using bulk batch API (up to 1000 per request)
+
+    paths can be any iterable; batches are pulled lazily so only one
+    batch list is materialized per submission. Pass total for progress
+    reporting when the iterable has no len().
+    """
+    if total is None and hasattr(paths, '__len__'):
+        total = len(paths)
+    deleted = 0
+    failed = 0
+
+    # Run a few batches concurrently - each is an independent server-side
+    # job, so the pool overlaps submission RTT and job execution
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BATCHES) as executor:
+        batches = enumerate(iter_batches(paths, batch_size), 1)
+
+        # Keep only MAX_CONCURRENT_BATCHES submissions in flight and top
+        # up as they finish - submitting everything at once would drain
+        # the path iterator into queued futures and materialize every
+        # batch list up front
+        in_flight = {
+            executor.submit(run_batch, dbx, batch, batch_num)
+            for batch_num, batch in itertools.islice(batches, MAX_CONCURRENT_BATCHES)
+        }
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch_deleted, batch_failed = future.result()
+                deleted += batch_deleted
+                failed += batch_failed
+                print(f"  Progress: {deleted}/{total if total is not None else '?'} deleted")
+            for batch_num, batch in itertools.islice(batches, len(done)):
+                in_flight.add(executor.submit(run_batch, dbx, batch, batch_num))
 
     print(f"\n{'='*70}")
     print(f"COMPLETE: {deleted} deleted, {failed} failed")
@@ -119,11 +174,10 @@ if __name__ == '__main__':
 
     list_file = sys.argv[1]
 
-    # Load paths
-    with open(list_file, 'r') as f:
-        paths = [line.strip() for line in f if line.strip()]
-
-    print(f"Loaded {len(paths)} paths from {list_file}")
+    # Count for progress, then stream - batches are consumed 1000 at a
+    # time so there's no need to hold millions of paths in memory
+    total = count_paths(list_file)
+    print(f"Found {total} paths in {list_file} (repeats are skipped)")
 
     # Load Dropbox client
     dbx = load_dropbox_client()
@@ -132,4 +186,4 @@ if __name__ == '__main__':
         sys.exit(1)
 
     # Delete using fast batch API
-    batch_delete_fast(dbx, paths)
+    batch_delete_fast(dbx, iter_unique_paths(list_file), total=total)
@@ -15,21 +15,55 @@ Created: 2025-11-15
 Purpose: Massive Dropbox cleanup and reorganization planning
 """
 
+import heapq
+import operator
 import os
 import sys
 import json
+import pickle
+import time
 import dropbox
-from dropbox.exceptions import AuthError, ApiError
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dropbox.exceptions import AuthError, ApiError, RateLimitError
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
+from dataclasses import dataclass, asdict
 from pathlib import Path
 
+# pandas turns the 1M-row analysis loop into columnar groupbys; the
+# pure-Python loop below stays as the fallback
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# orjson (Rust) serializes the report pieces ~5-10x faster than stdlib
+# json; stdlib remains the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional LLVM-compiled aggregation kernel for the columnar analysis
+# path; the pandas groupbys below stay as the fallback
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
 # Configuration
 TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-token')
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'catalog')
-CHECKPOINT_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-checkpoint.json')
+CHECKPOINT_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-checkpoint.pkl')
+ACCOUNT_CACHE_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-account.json')
 CHECKPOINT_INTERVAL = 10000  # Save checkpoint every N files
 
+# Scan threads: listing is network-latency bound (the GIL is released
+# during HTTP), and Dropbox tolerates ~100 req/s, so one worker per
+# top-level folder up to this cap overlaps the page-fetch RTTs
+MAX_SCAN_WORKERS = 20
+
 
 def load_token():
     """Load Dropbox API token from file or environment"""
@@ -54,32 +88,46 @@ def save_token(token):
     print(f"✓ Token saved to {TOKEN_FILE}")
 
 
-def save_checkpoint(cursor, all_files, all_folders):
-    """Save progress checkpoint"""
-    checkpoint = {
-        'cursor': cursor,
-        'timestamp': datetime.now().isoformat(),
-        'files_count': len(all_files),
-        'folders_count': len(all_folders),
-        'files': all_files,
-        'folders': all_folders
-    }
-    with open(CHECKPOINT_FILE, 'w') as f:
-        json.dump(checkpoint, f)
-    print(f"      [Checkpoint saved: {len(all_files):,} files]")
+def append_checkpoint(subtree_path, files, folders):
+    """Append one completed subtree to the checkpoint log.
+
+    The old scheme re-serialized every already-scanned file on each
+    save - O(N^2) JSON work across a full scan. An append-only pickle
+    log writes each subtree exactly once; fsync so a crash right after
+    the print can't lose the record.
+    """
+    with open(CHECKPOINT_FILE, 'ab') as f:
+        pickle.dump((subtree_path, files, folders), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    print(f"      [Checkpoint: {subtree_path or '/'} logged]")
 
 
 def load_checkpoint():
     """Load checkpoint if exists"""
-    if os.path.exists(CHECKPOINT_FILE):
-        try:
-            with open(CHECKPOINT_FILE, 'r') as f:
-                checkpoint = json.load(f)
-            return checkpoint
-        except Exception as e:
-            print(f"      Warning: Could not load checkpoint: {e}")
-            return None
-    return None
+    if not os.path.exists(CHECKPOINT_FILE):
+        return None
+    subtrees = {}
+    try:
+        with open(CHECKPOINT_FILE, 'rb') as f:
+            while True:
+                try:
+                    subtree_path, files, folders = pickle.load(f)
+                except EOFError:
+                    break
+                # Later records win, so a re-scanned subtree overrides
+                subtrees[subtree_path] = {'files': files, 'folders': folders}
+    except Exception as e:
+        print(f"      Warning: Could not load checkpoint: {e}")
+        return None
+    if not subtrees:
+        return None
+    return {
+        'timestamp': datetime.fromtimestamp(os.path.getmtime(CHECKPOINT_FILE)).isoformat(),
+        'files_count': sum(len(s['files']) for s in subtrees.values()),
+        'folders_count': sum(len(s['folders']) for s in subtrees.values()),
+        'subtrees': subtrees
+    }
 
 
 def clear_checkpoint():
@@ -89,70 +137,171 @@ def clear_checkpoint():
         print("      [Checkpoint cleared]")
 
 
+def _call_with_backoff(fn, *args, **kwargs):
+    """Call a Dropbox SDK method, honoring rate-limit backoff"""
+    delay = 1
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except RateLimitError as e:
+            wait = e.backoff or delay
+            print(f"      ⚠ Rate limited, retrying in {wait}s...")
+            time.sleep(wait)
+            delay = min(delay * 2, 60)
+
+
+@dataclass(slots=True)
+class FileInfo:
+    """One scanned file.
+
+    A slotted dataclass is ~120 bytes/instance against ~300+ for the
+    dict-per-file it replaces - a few hundred MB of RSS at 1M files -
+    and attribute access is faster than dict lookup in the analysis
+    loops. orjson serializes dataclasses natively, so the JSON report
+    keeps the same per-file shape.
+    """
+    path: str
+    name: str
+    size: int
+    modified_epoch: float | None
+    hash: str | None
+    extension: str
+    top_folder: str
+
+
+def _file_info(entry):
+    """Build the FileInfo for one FileMetadata entry.
+
+    Extension and top-level folder are derived here, where the entry is
+    already in cache from the network loop, so analyze_files never has
+    to re-scan paths. name.rpartition is a single C call where
+    os.path.splitext goes through several Python-level helpers.
+    """
+    name = entry.name
+    stem, dot, ext = name.rpartition('.')
+    path = entry.path_display
+    slash = path.find('/', 1)
+    return FileInfo(
+        path=path,
+        name=name,
+        size=entry.size,
+        # The SDK hands back naive UTC datetimes; tag them before
+        # .timestamp() so the epoch isn't skewed by the local TZ offset
+        modified_epoch=(entry.client_modified.replace(tzinfo=timezone.utc).timestamp()
+                        if entry.client_modified else None),
+        hash=entry.content_hash if hasattr(entry, 'content_hash') else None,
+        extension=('.' + ext.lower()) if dot and stem else '',
+        top_folder=path[:slash] if slash > 0 else '/',
+    )
+
+
+def scan_subtree(dbx, path):
+    """Recursively list one subtree; returns (files, folders)"""
+    files = []
+    folders = []
+    result = _call_with_backoff(dbx.files_list_folder, path, recursive=True,
+                                include_non_downloadable_files=False)
+
+    while True:
+        for entry in result.entries:
+            if isinstance(entry, dropbox.files.FileMetadata):
+                files.append(_file_info(entry))
+            elif isinstance(entry, dropbox.files.FolderMetadata):
+                folders.append({
+                    'path': entry.path_display,
+                    'name': entry.name
+                })
+
+        if not result.has_more:
+            break
+
+        result = _call_with_backoff(dbx.files_list_folder_continue, result.cursor)
+
+    return files, folders
+
+
 def get_folder_stats(dbx, path="", resume_checkpoint=None):
-    """Get all files and folders from Dropbox using recursive API call with checkpointing"""
+    """Get all files and folders from Dropbox, one scan thread per top-level folder.
+
+    The old single recursive stream spent nearly all its time waiting on
+    page-fetch round trips. Listing the root shallowly and fanning the
+    top-level folders out across a thread pool overlaps those RTTs;
+    each completed subtree goes into the checkpoint so an interrupted
+    scan only redoes unfinished folders.
+    """
     print(f"\n{'='*60}")
     print("DROPBOX CATALOG GENERATOR")
     print(f"{'='*60}\n")
 
-    all_files = []
-    all_folders = []
-    result = None
-
     print("[1/5] Scanning Dropbox account...")
-    print("      Using optimized recursive mode for 1M+ files...")
-    print(f"      Saving checkpoints every {CHECKPOINT_INTERVAL:,} files...\n")
+    print(f"      Using up to {MAX_SCAN_WORKERS} parallel folder scans...")
+    print("      Saving a checkpoint after each completed folder...\n")
 
-    try:
-        # Resume from checkpoint or start fresh
-        if resume_checkpoint:
-            all_files = resume_checkpoint['files']
-            all_folders = resume_checkpoint['folders']
-            cursor = resume_checkpoint['cursor']
-            print(f"      ↻ Resuming from checkpoint: {len(all_files):,} files already scanned")
-            print(f"      Checkpoint from: {resume_checkpoint['timestamp']}\n")
-            result = dbx.files_list_folder_continue(cursor)
-        else:
-            # Use recursive=True for MUCH faster scanning (single API call stream)
-            result = dbx.files_list_folder(path, recursive=True)
+    # subtrees: completed scan results keyed by top-level path
+    # ('' = files/folders that live directly in the root)
+    subtrees = {}
+    if resume_checkpoint:
+        subtrees = resume_checkpoint['subtrees']
+        print(f"      ↻ Resuming from checkpoint: {resume_checkpoint['files_count']:,} files already scanned")
+        print(f"      Checkpoint from: {resume_checkpoint['timestamp']}\n")
 
+    failed = False
+
+    try:
+        # Shallow root listing: root-level files plus the top-level
+        # folders that become the units of parallel work
+        root_files = []
+        top_folders = []
+        result = _call_with_backoff(dbx.files_list_folder, path,
+                                     include_non_downloadable_files=False)
         while True:
             for entry in result.entries:
                 if isinstance(entry, dropbox.files.FileMetadata):
-                    file_info = {
-                        'path': entry.path_display,
-                        'name': entry.name,
-                        'size': entry.size,
-                        'modified': entry.client_modified.isoformat() if entry.client_modified else None,
-                        'hash': entry.content_hash if hasattr(entry, 'content_hash') else None,
-                        'extension': os.path.splitext(entry.name)[1].lower()
-                    }
-                    all_files.append(file_info)
-
-                    # Progress update and checkpoint save
-                    if len(all_files) % CHECKPOINT_INTERVAL == 0:
-                        print(f"      Scanned {len(all_files):,} files, {len(all_folders):,} folders...")
-                        # Save checkpoint with current cursor
-                        if result.cursor:
-                            save_checkpoint(result.cursor, all_files, all_folders)
-
+                    root_files.append(_file_info(entry))
                 elif isinstance(entry, dropbox.files.FolderMetadata):
-                    all_folders.append({
+                    top_folders.append({
                         'path': entry.path_display,
                         'name': entry.name
                     })
-
             if not result.has_more:
                 break
-
-            # Continue with next batch
-            result = dbx.files_list_folder_continue(result.cursor)
+            result = _call_with_backoff(dbx.files_list_folder_continue, result.cursor)
+
+        subtrees[''] = {'files': root_files, 'folders': top_folders}
+        append_checkpoint('', root_files, top_folders)
+
+        pending = [f for f in top_folders if f['path'] not in subtrees]
+        if pending:
+            with ThreadPoolExecutor(max_workers=MAX_SCAN_WORKERS) as executor:
+                futures = {
+                    executor.submit(scan_subtree, dbx, folder['path']): folder['path']
+                    for folder in pending
+                }
+                done = 0
+                for future in as_completed(futures):
+                    subtree_path = futures[future]
+                    files, folders = future.result()
+                    subtrees[subtree_path] = {'files': files, 'folders': folders}
+                    done += 1
+                    print(f"      ✓ {subtree_path} ({len(files):,} files) "
+                          f"[{done}/{len(pending)} folders]")
+                    append_checkpoint(subtree_path, files, folders)
 
     except (ApiError, Exception) as e:
         print(f"\n      ✗ Error during scan: {e}")
+        failed = True
+
+    # Merge completed subtrees (root first, then folders in name order)
+    all_files = []
+    all_folders = []
+    for subtree_path in sorted(subtrees):
+        all_files.extend(subtrees[subtree_path]['files'])
+        all_folders.extend(subtrees[subtree_path]['folders'])
+
+    if failed:
+        # Completed subtrees are already in the append-only log
         print(f"      Progress saved at {len(all_files):,} files")
-        if result and result.cursor:
-            save_checkpoint(result.cursor, all_files, all_folders)
+        if subtrees:
             print(f"\n      You can resume by running the script again!")
         return [], []
 
@@ -169,35 +318,222 @@ def analyze_files(files):
     """Analyze file collection for insights"""
     print("[2/5] Analyzing files...")
 
+    if pd is not None and files:
+        analysis = _analyze_files_pandas(files)
+    else:
+        analysis = _analyze_files_python(files)
+
+    print(f"      ✓ Analysis complete\n")
+
+    return analysis
+
+
+# Age bucket edges in days, oldest-open-ended; shared by both analysis paths
+AGE_BUCKETS = [
+    (30, 'Last 30 days'),
+    (90, '30-90 days'),
+    (365, '3-12 months'),
+    (365 * 2, '1-2 years'),
+    (365 * 3, '2-3 years'),
+    (float('inf'), '3+ years'),
+]
+
+
+if njit:
+    @njit(cache=True)
+    def _bucket_kernel(sizes, epochs, ext_codes, folder_codes,
+                       n_ext, n_folder, now_ep):
+        """One fused compiled pass: extension, folder and age totals.
+
+        Replaces three separate groupby sweeps with a single
+        cache-friendly walk over the columnar arrays. Kept sequential -
+        the scatter-adds would race under prange.
+        """
+        ext_count = np.zeros(n_ext, dtype=np.int64)
+        ext_size = np.zeros(n_ext, dtype=np.int64)
+        folder_count = np.zeros(n_folder, dtype=np.int64)
+        folder_size = np.zeros(n_folder, dtype=np.int64)
+        age_count = np.zeros(6, dtype=np.int64)
+        age_size = np.zeros(6, dtype=np.int64)
+
+        for i in range(sizes.shape[0]):
+            size = sizes[i]
+            ext_count[ext_codes[i]] += 1
+            ext_size[ext_codes[i]] += size
+            folder_count[folder_codes[i]] += 1
+            folder_size[folder_codes[i]] += size
+
+            ep = epochs[i]
+            if not np.isnan(ep):
+                days = (now_ep - ep) // 86400.0
+                if days < 30:
+                    bucket = 0
+                elif days < 90:
+                    bucket = 1
+                elif days < 365:
+                    bucket = 2
+                elif days < 730:
+                    bucket = 3
+                elif days < 1095:
+                    bucket = 4
+                else:
+                    bucket = 5
+                age_count[bucket] += 1
+                age_size[bucket] += size
+
+        return ext_count, ext_size, folder_count, folder_size, age_count, age_size
+
+
+def _analyze_files_pandas(files):
+    """Columnar analysis: one DataFrame build, then C-level groupbys.
+
+    Per-row dict updates in the Python loop cost ~6 interpreted dict
+    operations per file; groupby/agg does the same reductions over
+    contiguous arrays. Output shape matches _analyze_files_python.
+    """
+    df = pd.DataFrame({
+        'path': [f.path for f in files],
+        'size': [f.size for f in files],
+        'extension': [f.extension for f in files],
+        'top_folder': [f.top_folder for f in files],
+        'modified_epoch': [f.modified_epoch for f in files],
+        'hash': [f.hash for f in files],
+    })
+
+    total_bytes = int(df['size'].sum())
     analysis = {
         'total_files': len(files),
-        'total_size_bytes': sum(f['size'] for f in files),
-        'total_size_gb': round(sum(f['size'] for f in files) / (1024**3), 2),
-        'by_extension': defaultdict(lambda: {'count': 0, 'size': 0}),
-        'by_age': defaultdict(lambda: {'count': 0, 'size': 0}),
+        'total_size_bytes': total_bytes,
+        'total_size_gb': round(total_bytes / (1024**3), 2),
+    }
+
+    ext = df['extension'].where(df['extension'].astype(bool), '(no extension)')
+    now_epoch = datetime.now().timestamp()
+    age_days = (now_epoch - df['modified_epoch']) // 86400
+
+    if njit:
+        # One fused compiled pass over the factorized columns instead
+        # of three groupby sweeps
+        ext_codes, ext_labels = pd.factorize(ext)
+        folder_codes, folder_labels = pd.factorize(df['top_folder'])
+        (ext_count, ext_size, folder_count, folder_size,
+         age_count, age_size) = _bucket_kernel(
+            df['size'].to_numpy(dtype=np.int64),
+            df['modified_epoch'].to_numpy(dtype=np.float64, na_value=np.nan),
+            ext_codes, folder_codes,
+            len(ext_labels), len(folder_labels), now_epoch)
+
+        analysis['by_extension'] = {
+            e: {'count': int(ext_count[i]), 'size': int(ext_size[i])}
+            for i, e in enumerate(ext_labels)
+        }
+        analysis['by_folder'] = {
+            f: {'count': int(folder_count[i]), 'size': int(folder_size[i])}
+            for i, f in enumerate(folder_labels)
+        }
+        analysis['by_age'] = {
+            label: {'count': int(age_count[i]), 'size': int(age_size[i])}
+            for i, (_, label) in enumerate(AGE_BUCKETS)
+            if age_count[i]
+        }
+    else:
+        # By extension
+        grouped = df.groupby(ext)['size'].agg(['count', 'sum'])
+        analysis['by_extension'] = {
+            e: {'count': int(row['count']), 'size': int(row['sum'])}
+            for e, row in grouped.iterrows()
+        }
+
+        # By folder (top-level) - precomputed during the scan
+        grouped = df.groupby('top_folder')['size'].agg(['count', 'sum'])
+        analysis['by_folder'] = {
+            f: {'count': int(row['count']), 'size': int(row['sum'])}
+            for f, row in grouped.iterrows()
+        }
+
+        # By age - pure float arithmetic on the scan-time epochs
+        edges, labels = zip(*AGE_BUCKETS)
+        bucket = pd.cut(age_days, [-1] + list(edges), labels=labels, right=False)
+        grouped = df[age_days.notna()].groupby(bucket, observed=True)['size'].agg(['count', 'sum'])
+        analysis['by_age'] = {
+            str(b): {'count': int(row['count']), 'size': int(row['sum'])}
+            for b, row in grouped.iterrows()
+        }
+
+    # Largest files
+    largest = df.nlargest(100, 'size')
+    analysis['largest_files'] = [
+        {'path': path, 'size_mb': round(size / (1024**2), 2)}
+        for path, size in zip(largest['path'], largest['size'])
+    ]
+
+    # Duplicates, tiered: equal content implies equal size, so first
+    # drop every file whose (non-zero) size is unique - typically 95%+
+    # of the account - then group the survivors by hash. Members are
+    # (path, size) pairs so downstream savings math never needs to look
+    # sizes back up in the full file list.
+    hashed = df[df['hash'].astype(bool) & (df['size'] > 0)]
+    sized = hashed[hashed.duplicated('size', keep=False)]
+    dups = sized[sized.duplicated('hash', keep=False)]
+    pairs = pd.Series(list(zip(dups['path'], dups['size'])), index=dups.index)
+    analysis['duplicates'] = pairs.groupby(dups['hash']).agg(list).to_dict()
+
+    # Old large files (3+ years, >1MB), biggest first
+    old = df[(age_days >= 365 * 3) & (df['size'] > 1024 * 1024)].nlargest(100, 'size')
+    analysis['old_files'] = [
+        {'path': path,
+         'size_mb': round(size / (1024**2), 2),
+         'age_years': round(days / 365, 1)}
+        for path, size, days in zip(old['path'], old['size'], age_days[old.index])
+    ]
+
+    return analysis
+
+
+def _analyze_files_python(files):
+    """Pure-Python fallback analysis (used when pandas isn't installed)"""
+    total_bytes = sum(f.size for f in files)
+    analysis = {
+        'total_files': len(files),
+        'total_size_bytes': total_bytes,
+        'total_size_gb': round(total_bytes / (1024**3), 2),
         'largest_files': [],
-        'duplicates': defaultdict(list),
         'old_files': [],
-        'by_folder': defaultdict(lambda: {'count': 0, 'size': 0})
     }
 
-    now = datetime.now()
+    # Parallel count/size accumulators: defaultdict(int) skips the
+    # lambda-on-miss and inner dict subscript of a dict-of-dicts, which
+    # is the hot operation in this 1M-iteration loop. The nested
+    # {'count','size'} report shape is reassembled once at the end.
+    ext_count, ext_size = defaultdict(int), defaultdict(int)
+    folder_count, folder_size = defaultdict(int), defaultdict(int)
+    age_count, age_size = defaultdict(int), defaultdict(int)
+
+    now_epoch = datetime.now().timestamp()
+
+    # Duplicate detection, tiered by size first: equal content implies
+    # equal size, so a file whose (non-zero) size is unique can never be
+    # a duplicate and its hash never enters a dict at all. First
+    # sightings are stored bare and promoted on the second, so no
+    # single-element lists are allocated along the way.
+    size_first = {}
+    candidates = []
 
     for file in files:
         # By extension
-        ext = file['extension'] or '(no extension)'
-        analysis['by_extension'][ext]['count'] += 1
-        analysis['by_extension'][ext]['size'] += file['size']
+        ext = file.extension or '(no extension)'
+        ext_count[ext] += 1
+        ext_size[ext] += file.size
 
-        # By folder (top-level)
-        folder = '/' + file['path'].split('/')[1] if len(file['path'].split('/')) > 1 else '/'
-        analysis['by_folder'][folder]['count'] += 1
-        analysis['by_folder'][folder]['size'] += file['size']
+        # By folder (top-level) - precomputed during the scan
+        folder = file.top_folder
+        folder_count[folder] += 1
+        folder_size[folder] += file.size
 
-        # By age
-        if file['modified']:
-            modified = datetime.fromisoformat(file['modified'].replace('Z', '+00:00'))
-            age_days = (now - modified.replace(tzinfo=None)).days
+        # By age - epoch subtraction instead of re-parsing an ISO string
+        # into a throwaway datetime per file
+        if file.modified_epoch is not None:
+            age_days = int((now_epoch - file.modified_epoch) // 86400)
 
             if age_days < 30:
                 age_bucket = 'Last 30 days'
@@ -212,40 +548,59 @@ def analyze_files(files):
             else:
                 age_bucket = '3+ years'
                 # Mark as old file
-                if file['size'] > 1024 * 1024:  # > 1MB
+                if file.size > 1024 * 1024:  # > 1MB
                     analysis['old_files'].append({
-                        'path': file['path'],
-                        'size_mb': round(file['size'] / (1024**2), 2),
+                        'path': file.path,
+                        'size_mb': round(file.size / (1024**2), 2),
                         'age_years': round(age_days / 365, 1)
                     })
 
-            analysis['by_age'][age_bucket]['count'] += 1
-            analysis['by_age'][age_bucket]['size'] += file['size']
-
-        # Duplicates (by hash)
-        if file['hash']:
-            analysis['duplicates'][file['hash']].append(file['path'])
-
-    # Find largest files
-    analysis['largest_files'] = sorted(
-        [{'path': f['path'], 'size_mb': round(f['size'] / (1024**2), 2)} for f in files],
-        key=lambda x: x['size_mb'],
-        reverse=True
-    )[:100]  # Top 100
-
-    # Filter duplicates (only keep where count > 1)
-    analysis['duplicates'] = {
-        k: v for k, v in analysis['duplicates'].items() if len(v) > 1
-    }
-
-    # Sort old files by size
-    analysis['old_files'] = sorted(
-        analysis['old_files'],
-        key=lambda x: x['size_mb'],
-        reverse=True
-    )[:100]  # Top 100
+            age_count[age_bucket] += 1
+            age_size[age_bucket] += file.size
+
+        # Size tier: collect only files that share a size with another
+        if file.hash and file.size:
+            first = size_first.setdefault(file.size, file)
+            if first is not file:
+                if first is None:
+                    candidates.append(file)
+                else:
+                    size_first[file.size] = None
+                    candidates.append(first)
+                    candidates.append(file)
+
+    # Reassemble the nested report shape from the flat accumulators
+    analysis['by_extension'] = {
+        e: {'count': ext_count[e], 'size': ext_size[e]} for e in ext_count}
+    analysis['by_folder'] = {
+        f: {'count': folder_count[f], 'size': folder_size[f]} for f in folder_count}
+    analysis['by_age'] = {
+        a: {'count': age_count[a], 'size': age_size[a]} for a in age_count}
+
+    # Find largest files - nlargest is O(N log 100) and skips both the
+    # full sort and the 1M-entry intermediate dict list the old
+    # sorted(...)[:100] built just to throw 99.99% of it away
+    analysis['largest_files'] = [
+        {'path': f.path, 'size_mb': round(f.size / (1024**2), 2)}
+        for f in heapq.nlargest(100, files, key=operator.attrgetter('size'))
+    ]
+
+    # Hash tier, over the same-size survivors only
+    seen = {}
+    dups = {}
+    for file in candidates:
+        h = file.hash
+        if h not in seen:
+            seen[h] = (file.path, file.size)
+        elif h in dups:
+            dups[h].append((file.path, file.size))
+        else:
+            dups[h] = [seen[h], (file.path, file.size)]
+    analysis['duplicates'] = dups
 
-    print(f"      ✓ Analysis complete\n")
+    # Old files: top 100 by size, same heap trick
+    analysis['old_files'] = heapq.nlargest(
+        100, analysis['old_files'], key=operator.itemgetter('size_mb'))
 
     return analysis
 
@@ -261,16 +616,12 @@ def generate_recommendations(analysis):
         dup_count = len(analysis['duplicates'])
         dup_files = sum(len(paths) - 1 for paths in analysis['duplicates'].values())
 
-        # Create O(1) lookup dict instead of O(n) linear scan - CRITICAL FIX!
-        path_to_file = {f['path']: f for f in analysis.get('all_files', [])}
-
+        # Sizes ride along in the duplicate groups, so the savings sum
+        # needs no lookup structure at all
         dup_size = 0
-        for hash_val, paths in analysis['duplicates'].items():
-            # Get files by path lookup (O(1) per file instead of O(n))
-            files = [path_to_file[path] for path in paths if path in path_to_file]
-            if files:
-                # Size saved = (total size of all copies) - (size of one copy we keep)
-                dup_size += sum(f['size'] for f in files) - files[0]['size']
+        for paths in analysis['duplicates'].values():
+            # Size saved = (total size of all copies) - (size of one copy we keep)
+            dup_size += sum(size for _, size in paths) - paths[0][1]
 
         recommendations.append({
             'category': 'Duplicates',
@@ -313,7 +664,7 @@ def generate_recommendations(analysis):
     return recommendations
 
 
-def generate_reports(analysis, recommendations):
+def generate_reports(analysis, recommendations, all_files):
     """Generate JSON and text reports"""
     print("[4/5] Generating reports...")
 
@@ -323,23 +674,47 @@ def generate_reports(analysis, recommendations):
     json_file = os.path.join(OUTPUT_DIR, f'dropbox-catalog-{timestamp}.json')
     txt_file = os.path.join(OUTPUT_DIR, f'dropbox-catalog-{timestamp}.txt')
 
-    # Prepare report data
-    report = {
-        'metadata': {
-            'generated': datetime.now().isoformat(),
-            'total_files': analysis['total_files'],
-            'total_size_gb': analysis['total_size_gb']
-        },
-        'analysis': analysis,
-        'recommendations': recommendations
+    metadata = {
+        'generated': datetime.now().isoformat(),
+        'total_files': analysis['total_files'],
+        'total_size_gb': analysis['total_size_gb']
     }
 
-    # Save JSON
-    with open(json_file, 'w') as f:
-        json.dump(report, f, indent=2, default=str)
-
-    # Generate text summary
-    summary = f"""
+    # Save JSON - streamed, not one giant json.dump. Building the full
+    # report dict and pretty-printing it doubles peak RSS (a second copy
+    # of the 1M-entry file list) and the indent formatter is slow; here
+    # the small sections are dumped compactly and all_files is written
+    # one record per line so only one file_info is in flight at a time.
+    # Each piece goes through orjson when available.
+    if orjson:
+        dumps = orjson.dumps
+    else:
+        def dumps(obj):
+            if isinstance(obj, FileInfo):
+                obj = asdict(obj)
+            return json.dumps(obj, separators=(',', ':')).encode()
+
+    with open(json_file, 'wb', buffering=1 << 20) as f:
+        f.write(b'{"metadata":')
+        f.write(dumps(metadata))
+        f.write(b',"analysis":{')
+        for key, value in analysis.items():
+            f.write(dumps(key))
+            f.write(b':')
+            f.write(dumps(value))
+            f.write(b',')
+        f.write(b'"all_files":[\n')
+        for i, file in enumerate(all_files):
+            if i:
+                f.write(b',\n')
+            f.write(dumps(file))
+        f.write(b'\n]},"recommendations":')
+        f.write(dumps(recommendations))
+        f.write(b'}')
+
+    # Generate text summary - collect parts and join once; repeated
+    # `summary +=` re-copies the whole growing string each time
+    parts = [f"""
 {'='*70}
 DROPBOX CATALOG REPORT
 {'='*70}
@@ -354,7 +729,7 @@ Total Size:  {analysis['total_size_gb']:.2f} GB
 {'='*70}
 TOP FOLDERS BY SIZE
 {'='*70}
-"""
+"""]
 
     # Top folders
     top_folders = sorted(
@@ -364,13 +739,13 @@ TOP FOLDERS BY SIZE
     )[:20]
 
     for folder, stats in top_folders:
-        summary += f"{folder:50s} {stats['count']:>8,} files  {stats['size']/(1024**3):>8.2f} GB\n"
+        parts.append(f"{folder:50s} {stats['count']:>8,} files  {stats['size']/(1024**3):>8.2f} GB\n")
 
-    summary += f"""
+    parts.append(f"""
 {'='*70}
 FILE TYPES BY SIZE
 {'='*70}
-"""
+""")
 
     # Top extensions
     top_ext = sorted(
@@ -380,63 +755,63 @@ FILE TYPES BY SIZE
     )[:20]
 
     for ext, stats in top_ext:
-        summary += f"{ext:30s} {stats['count']:>8,} files  {stats['size']/(1024**3):>8.2f} GB\n"
+        parts.append(f"{ext:30s} {stats['count']:>8,} files  {stats['size']/(1024**3):>8.2f} GB\n")
 
-    summary += f"""
+    parts.append(f"""
 {'='*70}
 FILES BY AGE
 {'='*70}
-"""
+""")
 
     age_order = ['Last 30 days', '30-90 days', '3-12 months', '1-2 years', '2-3 years', '3+ years']
     for age in age_order:
         if age in analysis['by_age']:
             stats = analysis['by_age'][age]
-            summary += f"{age:30s} {stats['count']:>8,} files  {stats['size']/(1024**3):>8.2f} GB\n"
+            parts.append(f"{age:30s} {stats['count']:>8,} files  {stats['size']/(1024**3):>8.2f} GB\n")
 
-    summary += f"""
+    parts.append(f"""
 {'='*70}
 CLEANUP RECOMMENDATIONS
 {'='*70}
-"""
+""")
 
     for i, rec in enumerate(recommendations, 1):
-        summary += f"""
+        parts.append(f"""
 [{i}] {rec['category']} - Priority: {rec['priority']}
     Potential Savings: {rec['potential_savings_gb']:.2f} GB ({rec['file_count']:,} files)
     {rec['description']}
-"""
+""")
 
-    summary += f"""
+    parts.append(f"""
 {'='*70}
 LARGEST FILES (Top 50)
 {'='*70}
-"""
+""")
 
     for file in analysis['largest_files'][:50]:
-        summary += f"{file['size_mb']:>10.2f} MB  {file['path']}\n"
+        parts.append(f"{file['size_mb']:>10.2f} MB  {file['path']}\n")
 
     if analysis['duplicates']:
-        summary += f"""
+        parts.append(f"""
 {'='*70}
 DUPLICATE FILES (Sample - Top 20 groups)
 {'='*70}
-"""
+""")
         for i, (hash_val, paths) in enumerate(list(analysis['duplicates'].items())[:20], 1):
-            summary += f"\n[{i}] Duplicate group ({len(paths)} copies):\n"
-            for path in paths:
-                summary += f"    {path}\n"
+            parts.append(f"\n[{i}] Duplicate group ({len(paths)} copies):\n")
+            for path, _ in paths:
+                parts.append(f"    {path}\n")
 
-    summary += f"""
+    parts.append(f"""
 {'='*70}
 OLD FILES (3+ years, >1MB, Top 50)
 {'='*70}
-"""
+""")
 
     for file in analysis['old_files'][:50]:
-        summary += f"{file['size_mb']:>10.2f} MB  ({file['age_years']:.1f} years old)  {file['path']}\n"
+        parts.append(f"{file['size_mb']:>10.2f} MB  ({file['age_years']:.1f} years old)  {file['path']}\n")
 
-    summary += f"""
+    parts.append(f"""
 {'='*70}
 END OF REPORT
 {'='*70}
@@ -446,10 +821,10 @@ Next Steps:
 2. Feed this report to Gordo for interactive cleanup
 3. Make decisions on what to delete/reorganize
 4. Run cleanup scripts (to be created based on your decisions)
-"""
+""")
 
     with open(txt_file, 'w') as f:
-        f.write(summary)
+        f.write(''.join(parts))
 
     print(f"      ✓ JSON report: {json_file}")
     print(f"      ✓ Text report: {txt_file}\n")
@@ -498,21 +873,56 @@ def main():
             clear_checkpoint()
             checkpoint = None
 
-    # Initialize Dropbox client
+    # Initialize Dropbox client. users_get_current_account is a full
+    # HTTPS roundtrip that only feeds the greeting, so cache it in a
+    # sidecar for 24h and skip the call on repeated runs / resumes -
+    # auth errors still surface on the first list_folder call.
     print("[0/5] Connecting to Dropbox...")
-    try:
-        dbx = dropbox.Dropbox(token)
-        account = dbx.users_get_current_account()
-        print(f"      ✓ Connected as: {account.name.display_name}")
-        print(f"      Email: {account.email}\n")
-    except AuthError:
-        print("\n✗ Invalid token. Please check and try again.")
-        if os.path.exists(TOKEN_FILE):
-            os.remove(TOKEN_FILE)
-        return 1
+    dbx = dropbox.Dropbox(token)
+    cached = None
+    if os.path.exists(ACCOUNT_CACHE_FILE):
+        try:
+            with open(ACCOUNT_CACHE_FILE, 'r') as f:
+                cached = json.load(f)
+            if time.time() - cached.get('ts', 0) > 24 * 3600:
+                cached = None
+        except (OSError, ValueError):
+            cached = None
+
+    if cached:
+        print(f"      ✓ Connected as: {cached['name']} (cached)")
+        print(f"      Email: {cached['email']}\n")
+    else:
+        try:
+            account = dbx.users_get_current_account()
+            print(f"      ✓ Connected as: {account.name.display_name}")
+            print(f"      Email: {account.email}\n")
+            with open(ACCOUNT_CACHE_FILE, 'w') as f:
+                json.dump({'name': account.name.display_name,
+                           'email': account.email,
+                           'ts': time.time()}, f)
+        except AuthError:
+            print("\n✗ Invalid token. Please check and try again.")
+            if os.path.exists(TOKEN_FILE):
+                os.remove(TOKEN_FILE)
+            return 1
 
-    # Get all files (with optional resume)
-    all_files, all_folders = get_folder_stats(dbx, resume_checkpoint=checkpoint if resume else None)
+    # Get all files (with optional resume). --async uses the shared
+    # aiohttp REST scan: a single event loop with up to 50 list_folder
+    # calls in flight beats the thread pool on accounts with many
+    # top-level folders, but has no checkpoint/resume support.
+    if '--async' in sys.argv:
+        import _dropbox_async
+        if _dropbox_async.aiohttp is None:
+            print("✗ --async requires aiohttp (pip install aiohttp); using threaded scan\n")
+            all_files, all_folders = get_folder_stats(dbx, resume_checkpoint=checkpoint if resume else None)
+        else:
+            print("[1/5] Scanning Dropbox account (async REST)...")
+            all_files, all_folders = _dropbox_async.scan_account(token)
+            all_files = [FileInfo(**f) for f in all_files]
+            print(f"      ✓ Total: {len(all_files):,} files, {len(all_folders):,} folders\n")
+    else:
+        all_files, all_folders = get_folder_stats(dbx, resume_checkpoint=checkpoint if resume else None)
 
     # Check if scan failed
     if not all_files and not all_folders:
@@ -520,15 +930,16 @@ def main():
         print("   Run the script again to resume.\n")
         return 1
 
-    # Analyze
+    # Analyze (all_files is passed alongside rather than stuffed into
+    # the analysis dict, so the analysis stays small and the file list
+    # can be streamed straight to the JSON report)
     analysis = analyze_files(all_files)
-    analysis['all_files'] = all_files  # Keep for duplicate size calculation
 
     # Generate recommendations
     recommendations = generate_recommendations(analysis)
 
     # Generate reports
-    json_file, txt_file = generate_reports(analysis, recommendations)
+    json_file, txt_file = generate_reports(analysis, recommendations, all_files)
 
     # Summary
     print("[5/5] Summary")
@@ -5,38 +5,11 @@ Delete files/folders from Dropbox via API
 Usage: python3 delete-from-dropbox.py <path>
 """
 
-import os
 import sys
 import dropbox
 from dropbox.exceptions import ApiError
 
-TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-token')
-REFRESH_TOKEN_FILE = os.path.join(os.path.dirname(__file__), '.dropbox-refresh-token')
-
-def load_dropbox_client():
-    """Load Dropbox client with refresh token support"""
-    # Try refresh token first (best option - never expires)
-    if os.path.exists(REFRESH_TOKEN_FILE):
-        with open(REFRESH_TOKEN_FILE, 'r') as f:
-            lines = f.read().strip().split('\n')
-            if len(lines) == 3:
-                app_key, app_secret, refresh_token = lines
-                return dropbox.Dropbox(
-                    app_key=app_key,
-                    app_secret=app_secret,
-                    oauth2_refresh_token=refresh_token
-                )
-
-    # Fall back to access token (expires in 4 hours)
-    token = os.environ.get('DROPBOX_TOKEN')
-    if not token and os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'r') as f:
-            token = f.read().strip()
-
-    if token:
-        return dropbox.Dropbox(token)
-
-    return None
+from _dropbox_auth import load_dropbox_client
 
 def delete_path(dbx, path):
     """Delete a file or folder from Dropbox"""
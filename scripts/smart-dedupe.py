@@ -7,6 +7,20 @@ import json
 import sys
 from pathlib import Path
 
+# ijson pulls just the duplicates mapping out of the catalog without
+# building the whole document (all_files included) in memory
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# When streaming isn't available, orjson still parses the whole
+# document 3-5x faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def smart_dedupe(catalog_path, target_folders, keep_preference=None):
     """
     Find duplicates and decide which copies to delete
@@ -16,23 +30,41 @@ def smart_dedupe(catalog_path, target_folders, keep_preference=None):
         target_folders: List of folder paths to deduplicate
         keep_preference: Function that takes a list of paths and returns the one to KEEP
     """
-    with open(catalog_path, 'r') as f:
-        data = json.load(f)
-
-    duplicates = data['analysis']['duplicates']
-    path_to_file = {f['path']: f for f in data['analysis']['all_files']}
+    # Only the duplicate groups are consulted below - don't parse or
+    # index the (much larger) all_files list at all when ijson can
+    # stream past it
+    if ijson is not None:
+        with open(catalog_path, 'rb') as f:
+            duplicates = dict(ijson.kvitems(f, 'analysis.duplicates'))
+    else:
+        with open(catalog_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        duplicates = data['analysis']['duplicates']
+
+    # Newer catalogs store (path, size) pairs inside each group, older
+    # ones bare path strings - normalize to paths once up front, the
+    # same way analyze-dropbox-duplicates does
+    duplicates = {
+        h: [p[0] for p in paths] if paths and not isinstance(paths[0], str) else paths
+        for h, paths in duplicates.items()
+    }
+
+    # startswith takes a tuple and runs all prefix checks in one C
+    # call, so no any()-generator per path
+    target_folders = tuple(target_folders)
 
     to_delete = []
 
-    for hash_val, paths in duplicates.items():
-        if len(paths) < 2:
-            continue
-
-        # Check if any path is in our target folders
-        relevant_paths = [p for p in paths if any(p.startswith(tf) for tf in target_folders)]
-        if not relevant_paths:
-            continue
+    # One prefix pass up front: only groups with at least one path
+    # under a target folder survive, so the keep/delete logic below
+    # never touches the ~90%+ of groups outside the targets
+    target_groups = [
+        paths for paths in duplicates.values()
+        if len(paths) > 1 and any(p.startswith(target_folders) for p in paths)
+    ]
 
+    for paths in target_groups:
         # Decide which to keep
         if keep_preference:
             keep_path = keep_preference(paths)
@@ -42,7 +74,7 @@ def smart_dedupe(catalog_path, target_folders, keep_preference=None):
 
         # Delete all others
         for path in paths:
-            if path != keep_path and any(path.startswith(tf) for tf in target_folders):
+            if path != keep_path and path.startswith(target_folders):
                 to_delete.append(path)
 
     return to_delete